@@ -0,0 +1,8 @@
+"""Offline benchmark suite for the ELD route API.
+
+Run everything against a throwaway database with a stubbed geocoder:
+
+    python -m benchmarks run --output bench.json
+    python -m benchmarks run --baseline bench.json --output bench-new.json
+    python -m benchmarks compare bench.json bench-new.json
+"""
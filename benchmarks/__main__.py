@@ -0,0 +1,97 @@
+import argparse
+import sys
+
+from .results import check_against_baseline, load_results, write_results
+
+
+def run(args):
+    from .environment import benchmark_database, setup_django
+
+    setup_django()
+
+    from .geocoder import use_stub_geocoder
+    from .load import run_load
+    from .micro import run_microbenchmarks
+    from .results import run_metadata
+    from .seed import seed_trips
+
+    config = {
+        'trips': args.trips,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'geocoder_latency': args.geocoder_latency,
+    }
+    results = {'meta': run_metadata(config)}
+
+    with benchmark_database(), use_stub_geocoder(latency=args.geocoder_latency):
+        print(f'Seeding {args.trips} trips...')
+        seeded = seed_trips(args.trips, seed=args.seed)
+        trip_ids = seeded.pop('trip_ids')
+        results['meta']['dataset'] = seeded
+        print(f"  {seeded['route_segments']} route segments, {seeded['eld_logs']} ELD logs")
+
+        if not args.skip_micro:
+            print('Microbenchmarks:')
+            results['micro'] = run_microbenchmarks(trip_ids, repeat=args.repeat)
+        if not args.skip_load:
+            print(f'Load ({args.requests} requests per route, concurrency {args.concurrency}):')
+            results['load'] = run_load(
+                trip_ids, total_requests=args.requests,
+                concurrency=args.concurrency, seed=args.seed,
+            )
+
+    if args.output:
+        write_results(results, args.output)
+        print(f'Results written to {args.output}')
+
+    status = 0
+    load_errors = results.get('load', {}).get('all', {}).get('errors', 0)
+    if load_errors:
+        print(f'Load phase recorded {load_errors} failed requests')
+        status = 1
+
+    if args.baseline:
+        status = max(status, check_against_baseline(load_results(args.baseline), results, args.threshold))
+    return status
+
+
+def compare(args):
+    return check_against_baseline(
+        load_results(args.baseline), load_results(args.current), args.threshold
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline benchmarks for the ELD route API.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='seed a throwaway database and run benchmarks')
+    run_parser.add_argument('--trips', type=int, default=200, help='trips to seed')
+    run_parser.add_argument('--seed', type=int, default=0, help='random seed for data and payloads')
+    run_parser.add_argument('--repeat', type=int, default=15, help='samples per microbenchmark')
+    run_parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    run_parser.add_argument('--concurrency', type=int, default=8, help='requests in flight')
+    run_parser.add_argument('--geocoder-latency', type=float, default=0.0,
+                            help='seconds the stub geocoder sleeps per lookup')
+    run_parser.add_argument('--skip-micro', action='store_true')
+    run_parser.add_argument('--skip-load', action='store_true')
+    run_parser.add_argument('--output', help='write JSON results to this path')
+    run_parser.add_argument('--baseline', help='JSON results to flag regressions against')
+    run_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='relative change treated as a regression (default 0.10)')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
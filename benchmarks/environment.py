@@ -0,0 +1,38 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import django
+
+_temp_dir = None
+
+
+def setup_django():
+    """Configure Django with the project settings and a disposable database"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eld_project.settings')
+    from django.conf import settings
+
+    global _temp_dir
+    # Use a temporary file rather than in-memory SQLite so server threads share data
+    _temp_dir = tempfile.TemporaryDirectory(prefix='eld-bench-')
+    db_file = os.path.join(_temp_dir.name, 'bench.sqlite3')
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = db_file
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create the benchmark schema for the duration of the block"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    # DEBUG would record every query and skew both timings and memory
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if _temp_dir is not None:
+            _temp_dir.cleanup()
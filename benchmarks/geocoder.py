@@ -0,0 +1,55 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from geopy.location import Location
+
+# Real coordinates for common freight hubs so distances look like real trips
+CITIES = {
+    'New York, NY': (40.7128, -74.0060),
+    'Chicago, IL': (41.8781, -87.6298),
+    'Los Angeles, CA': (34.0522, -118.2437),
+    'Houston, TX': (29.7604, -95.3698),
+    'Dallas, TX': (32.7767, -96.7970),
+    'Atlanta, GA': (33.7490, -84.3880),
+    'Denver, CO': (39.7392, -104.9903),
+    'Seattle, WA': (47.6062, -122.3321),
+    'Phoenix, AZ': (33.4484, -112.0740),
+    'Memphis, TN': (35.1495, -90.0490),
+    'Kansas City, MO': (39.0997, -94.5786),
+    'Columbus, OH': (39.9612, -82.9988),
+    'Salt Lake City, UT': (40.7608, -111.8910),
+    'Jacksonville, FL': (30.3322, -81.6557),
+    'Indianapolis, IN': (39.7684, -86.1581),
+    'Sacramento, CA': (38.5816, -121.4944),
+}
+
+
+class StubGeocoder:
+    """Deterministic, offline stand-in for geopy's Nominatim geocoder"""
+
+    def __init__(self, latency=0.0, **kwargs):
+        self.latency = latency
+
+    def geocode(self, query, **kwargs):
+        """Resolve known cities exactly and hash anything else into the continental US"""
+        if self.latency:
+            time.sleep(self.latency)
+        coords = CITIES.get(query)
+        if coords is None:
+            digest = hashlib.sha256(query.encode('utf-8')).digest()
+            lat = 25.0 + int.from_bytes(digest[:4], 'big') / 2 ** 32 * 24.0
+            lng = -124.0 + int.from_bytes(digest[4:8], 'big') / 2 ** 32 * 57.0
+            coords = (round(lat, 4), round(lng, 4))
+        return Location(query, coords, {})
+
+
+@contextmanager
+def use_stub_geocoder(latency=0.0):
+    """Make every RouteService created inside the block use StubGeocoder"""
+    def factory(*args, **kwargs):
+        return StubGeocoder(latency=latency)
+
+    with mock.patch('trip_planner.services.Nominatim', factory):
+        yield
@@ -0,0 +1,141 @@
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.urls import reverse
+
+from trip_planner.urls import urlpatterns
+
+from .geocoder import CITIES
+from .results import summarize
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request to stderr"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve(host='127.0.0.1'):
+    """Run the project's WSGI app on an ephemeral port in a background thread"""
+    server = ThreadedWSGIServer((host, 0), QuietRequestHandler, allow_reuse_address=False)
+    server.set_app(WSGIHandler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class RouteTarget:
+    """Produces requests for one named route, cycling through seeded trips"""
+
+    def __init__(self, pattern, trip_ids, rng):
+        self.name = pattern.name
+        self.params = list(pattern.pattern.converters)
+        self.method = 'POST' if self.name in POST_PAYLOADS else 'GET'
+        self._trip_ids = itertools.cycle(trip_ids)
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    def next_request(self):
+        with self._lock:
+            # Every path parameter in trip_planner.urls identifies a trip
+            trip_id = next(self._trip_ids)
+            payload = POST_PAYLOADS[self.name](self._rng) if self.method == 'POST' else None
+        path = reverse(self.name, kwargs={param: trip_id for param in self.params})
+        return path, payload
+
+
+def _trip_create_payload(rng):
+    current, pickup, dropoff = rng.sample(sorted(CITIES), 3)
+    return {
+        'current_location': current,
+        'pickup_location': pickup,
+        'dropoff_location': dropoff,
+        'current_cycle_used': round(rng.uniform(0, 60), 1),
+    }
+
+
+POST_PAYLOADS = {
+    'trip-create': _trip_create_payload,
+}
+
+
+def build_targets(trip_ids, seed=0):
+    rng = random.Random(seed)
+    return [RouteTarget(pattern, trip_ids, rng) for pattern in urlpatterns]
+
+
+def run_route(base_url, target, total_requests, concurrency, warmup=5):
+    """Fire total_requests at one route with a fixed number of in-flight requests"""
+    local = threading.local()
+
+    def send():
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            # Never route loopback traffic through an HTTP(S)_PROXY from the environment
+            session.trust_env = False
+        path, payload = target.next_request()
+        start = time.perf_counter()
+        try:
+            response = session.request(target.method, base_url + path, json=payload)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: send(), range(warmup)))
+        started = time.perf_counter()
+        outcomes = list(pool.map(lambda _: send(), range(total_requests)))
+        wall_time = time.perf_counter() - started
+
+    latencies = [elapsed for elapsed, _ in outcomes]
+    stats = summarize(latencies)
+    stats.update({
+        'method': target.method,
+        'concurrency': concurrency,
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'wall_time': wall_time,
+        'throughput_rps': len(outcomes) / wall_time if wall_time else 0.0,
+    })
+    return stats, latencies
+
+
+def run_load(trip_ids, total_requests=200, concurrency=8, seed=0, log=print):
+    """Load every route in trip_planner.urls in turn and report per-route stats"""
+    results = {}
+    all_latencies = []
+    total_wall_time = 0.0
+    with serve() as base_url:
+        for target in build_targets(trip_ids, seed=seed):
+            stats, latencies = run_route(base_url, target, total_requests, concurrency)
+            results[target.name] = stats
+            all_latencies.extend(latencies)
+            total_wall_time += stats['wall_time']
+            log(f"  {target.method} {target.name}: {stats['throughput_rps']:.1f} req/s, "
+                f"p50 {stats['p50'] * 1e3:.1f}ms p95 {stats['p95'] * 1e3:.1f}ms "
+                f"p99 {stats['p99'] * 1e3:.1f}ms, {stats['errors']} errors")
+
+    overall = summarize(all_latencies)
+    overall.update({
+        'concurrency': concurrency,
+        'errors': sum(stats['errors'] for stats in results.values()),
+        'wall_time': total_wall_time,
+        'throughput_rps': len(all_latencies) / total_wall_time if total_wall_time else 0.0,
+    })
+    results['all'] = overall
+    return results
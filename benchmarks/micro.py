@@ -0,0 +1,82 @@
+import timeit
+
+from django.db.models import Prefetch
+
+from trip_planner.models import Trip, RouteSegment, ELDLog
+from trip_planner.serializers import (
+    TripSerializer, TripCreateSerializer, RouteSegmentSerializer, ELDLogSerializer
+)
+from trip_planner.services import RouteService, ELDService
+
+from .geocoder import CITIES, StubGeocoder
+from .results import summarize
+
+
+def measure(func, repeat=15, target_seconds=0.05):
+    """Time func, batching calls so each sample takes roughly target_seconds"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(target_seconds / (elapsed / number)))
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    stats = summarize(samples)
+    stats['calls_per_sample'] = number
+    stats['ops_per_sec'] = 1.0 / stats['mean'] if stats['mean'] else 0.0
+    return stats
+
+
+def _sample_trip(trip_ids):
+    """Load the trip with the most logs, with relations prefetched"""
+    trips = Trip.objects.filter(id__in=trip_ids[:50]).prefetch_related(
+        Prefetch('route_segments', queryset=RouteSegment.objects.all()),
+        Prefetch('eld_logs', queryset=ELDLog.objects.all()),
+    )
+    return max(trips, key=lambda trip: (len(trip.eld_logs.all()), trip.id))
+
+
+def build_benchmarks(trip_ids):
+    """Return {name: callable} for every microbenchmark"""
+    route_service = RouteService()
+    route_service.geolocator = StubGeocoder()
+    eld_service = ELDService()
+
+    trip = _sample_trip(trip_ids)
+    route_data = route_service.get_route_data(trip)
+    start_coords = CITIES['New York, NY']
+    end_coords = CITIES['Los Angeles, CA']
+    segments = list(trip.route_segments.all())
+    logs = list(trip.eld_logs.all())
+    create_payload = {
+        'current_location': trip.current_location,
+        'pickup_location': trip.pickup_location,
+        'dropoff_location': trip.dropoff_location,
+        'current_cycle_used': trip.current_cycle_used,
+    }
+
+    def validate_trip_create():
+        serializer = TripCreateSerializer(data=create_payload)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    return {
+        'route_service.calculate_distance_duration':
+            lambda: route_service.calculate_distance_duration(start_coords, end_coords),
+        'eld_service.generate_eld_logs':
+            lambda: eld_service.generate_eld_logs(trip, route_data),
+        'serializer.RouteSegmentSerializer':
+            lambda: RouteSegmentSerializer(segments, many=True).data,
+        'serializer.ELDLogSerializer':
+            lambda: ELDLogSerializer(logs, many=True).data,
+        'serializer.TripSerializer':
+            lambda: TripSerializer(trip).data,
+        'serializer.TripCreateSerializer':
+            validate_trip_create,
+    }
+
+
+def run_microbenchmarks(trip_ids, repeat=15, log=print):
+    results = {}
+    for name, func in build_benchmarks(trip_ids).items():
+        results[name] = measure(func, repeat=repeat)
+        log(f"  {name}: p50 {results[name]['p50'] * 1e6:.1f}us "
+            f"({results[name]['ops_per_sec']:.0f} ops/s)")
+    return results
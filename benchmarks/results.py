@@ -0,0 +1,174 @@
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+SCHEMA_VERSION = 1
+
+# Per section: (metric, higher_is_worse, minimum sample count, threshold multiplier).
+# Microbenchmarks compare only the fastest sample, the least noisy estimate; mean,
+# percentiles and ops_per_sec are reported but would restate the same change.
+# Load tails need enough requests before p95/p99 is more than the worst few samples.
+COMPARED_METRICS = {
+    'micro': [
+        ('min', True, 0, 1),
+    ],
+    'load': [
+        ('throughput_rps', False, 0, 1),
+        ('p95', True, 100, 2),
+        ('p99', True, 1000, 2),
+    ],
+}
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples):
+    """Latency distribution (in seconds) for a list of samples"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        'count': count,
+        'mean': sum(ordered) / count if count else 0.0,
+        'min': ordered[0] if count else 0.0,
+        'max': ordered[-1] if count else 0.0,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+    }
+
+
+def run_metadata(config):
+    """Describe the machine and revision a run was taken on"""
+    import django
+
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'config': config,
+    }
+
+
+def write_results(results, path):
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True, default=str)
+        fh.write('\n')
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def config_mismatches(baseline, current):
+    """Describe settings and dataset differences that make two runs incomparable"""
+    mismatches = []
+    for key in ('config', 'dataset'):
+        old = baseline.get('meta', {}).get(key, {})
+        new = current.get('meta', {}).get(key, {})
+        for name in sorted(set(old) | set(new)):
+            if old.get(name) != new.get(name):
+                mismatches.append(f"{key}.{name}: {old.get(name)!r} -> {new.get(name)!r}")
+    return mismatches
+
+
+def missing_results(baseline, current):
+    """Benchmarks and routes in the baseline that the current run did not produce"""
+    missing = []
+    for section in COMPARED_METRICS:
+        # A section skipped entirely (--skip-micro / --skip-load) is not a loss
+        if section not in current:
+            continue
+        for name in baseline.get(section, {}):
+            if name not in current[section]:
+                missing.append(f"{section}/{name}")
+    return missing
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """Return every compared metric that got worse by more than threshold"""
+    regressions = []
+    for section, metrics in COMPARED_METRICS.items():
+        old_section = baseline.get(section, {})
+        for name, new_stats in current.get(section, {}).items():
+            old_stats = old_section.get(name) or {}
+            # Failing requests are often faster, so any error is a regression on its own
+            if new_stats.get('errors', 0) > 0:
+                regressions.append({
+                    'section': section,
+                    'name': name,
+                    'metric': 'errors',
+                    'baseline': old_stats.get('errors', 0),
+                    'current': new_stats['errors'],
+                    'change': None,
+                })
+            for metric, higher_is_worse, min_count, multiplier in metrics:
+                old, new = old_stats.get(metric), new_stats.get(metric)
+                if not old or new is None:
+                    continue
+                if min(old_stats.get('count', 0), new_stats.get('count', 0)) < min_count:
+                    continue
+                change = (new - old) / old
+                if (change if higher_is_worse else -change) > threshold * multiplier:
+                    regressions.append({
+                        'section': section,
+                        'name': name,
+                        'metric': metric,
+                        'baseline': old,
+                        'current': new,
+                        'change': change,
+                    })
+    return regressions
+
+
+def check_against_baseline(baseline, current, threshold=0.10):
+    """Print the comparison and return the exit status: 0 clean, 1 regressed, 2 incomparable"""
+    mismatches = config_mismatches(baseline, current)
+    if mismatches:
+        print('Refusing to compare runs with different settings:')
+        for mismatch in mismatches:
+            print(f'  {mismatch}')
+        return 2
+
+    status = 0
+    missing = missing_results(baseline, current)
+    if missing:
+        print('Missing from the current run:')
+        for name in missing:
+            print(f'  {name}')
+        status = 1
+
+    regressions = compare_results(baseline, current, threshold)
+    print(format_regressions(regressions))
+    return 1 if regressions else status
+
+
+def format_regressions(regressions):
+    if not regressions:
+        return 'No regressions.'
+    lines = ['Regressions:']
+    for r in regressions:
+        change = '' if r['change'] is None else f" ({r['change']:+.1%})"
+        lines.append(
+            f"  {r['section']}/{r['name']} {r['metric']}: "
+            f"{r['baseline']:.6g} -> {r['current']:.6g}{change}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,63 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from trip_planner.models import Trip, RouteSegment, ELDLog
+from trip_planner.services import RouteService, ELDService
+
+from .geocoder import CITIES, StubGeocoder
+
+
+def seed_trips(count, seed=0, max_age_days=365, batch_size=500):
+    """Bulk-create realistic planned trips spread over the last max_age_days"""
+    rng = random.Random(seed)
+    route_service = RouteService()
+    route_service.geolocator = StubGeocoder()
+    eld_service = ELDService()
+    now = timezone.now()
+    today = now.date()
+    city_names = sorted(CITIES)
+
+    trips, segments, logs = [], [], []
+    for _ in range(count):
+        current, pickup, dropoff = rng.sample(city_names, 3)
+        created_at = now - timedelta(days=rng.uniform(0, max_age_days))
+        trip = Trip(
+            # Derive ids from the seed too, so every run benchmarks the same trips
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            current_location=current,
+            pickup_location=pickup,
+            dropoff_location=dropoff,
+            current_cycle_used=round(rng.uniform(0, 60), 1),
+            created_at=created_at,
+        )
+
+        route_data = route_service.get_route_data(trip)
+        trip.total_distance = route_data['total_distance']
+        trip.estimated_duration = route_data['total_duration']
+        trip.fuel_stops_needed = route_data['fuel_stops_needed']
+        trips.append(trip)
+
+        for i, segment_data in enumerate(route_data['route_segments']):
+            segments.append(RouteSegment(trip=trip, sequence_order=i + 1, **segment_data))
+
+        # ELDService plans from "now"; shift the logs back to the trip's own dates
+        day_shift = created_at.date() - today
+        for log_data in eld_service.generate_eld_logs(trip, route_data):
+            log_data['log_date'] += day_shift
+            logs.append(ELDLog(trip=trip, **log_data))
+
+    with transaction.atomic():
+        Trip.objects.bulk_create(trips, batch_size=batch_size)
+        RouteSegment.objects.bulk_create(segments, batch_size=batch_size)
+        ELDLog.objects.bulk_create(logs, batch_size=batch_size)
+
+    return {
+        'trip_ids': [trip.id for trip in trips],
+        'trips': len(trips),
+        'route_segments': len(segments),
+        'eld_logs': len(logs),
+    }
@@ -80,3 +80,7 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# ELD log archive for closed trips past the retention window
+ELD_ARCHIVE_ROOT = Path(os.getenv('ELD_ARCHIVE_ROOT', BASE_DIR / 'archive'))
+ELD_ARCHIVE_RETENTION_DAYS = int(os.getenv('ELD_ARCHIVE_RETENTION_DAYS', '183'))
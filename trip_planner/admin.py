@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Trip, RouteSegment, ELDLog
+from .models import Trip, RouteSegment, ELDLog, TripArchive
 
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
@@ -19,3 +19,20 @@ class ELDLogAdmin(admin.ModelAdmin):
     list_display = ('trip', 'log_date', 'start_time', 'end_time', 'duty_status', 'duration')
     list_filter = ('duty_status', 'log_date')
     ordering = ('trip', 'log_date', 'start_time')
+
+@admin.register(TripArchive)
+class TripArchiveAdmin(admin.ModelAdmin):
+    list_display = ('trip', 'path', 'first_log_date', 'last_log_date', 'log_count', 'archived_at')
+    list_filter = ('archived_at',)
+    readonly_fields = ('trip', 'path', 'first_log_date', 'last_log_date', 'log_count', 'segment_count', 'archived_at')
+
+    # Stubs are only managed by the archive_eld_logs command
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Removing a stub would orphan the trip's archived logs
+    def has_delete_permission(self, request, obj=None):
+        return False
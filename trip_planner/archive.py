@@ -0,0 +1,521 @@
+"""Columnar archive for the ELD logs and route segments of closed trips.
+
+Files are partitioned by the month of each trip's first log, and compaction
+keeps each month down to a single file. Rows are grouped per trip into row
+groups, and every column of a row group is stored as a separately
+zlib-compressed typed array, so reading one trip only inflates the columns of
+one row group. The JSON footer maps each trip to its (row group, start, count).
+"""
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import date, time
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Trip, RouteSegment, ELDLog, TripArchive
+
+MAGIC = b'ELDARCH1'
+FOOTER = struct.Struct('<Q8s')  # Header length, magic
+FORMAT_VERSION = 1
+ROW_GROUP_SIZE = 4096
+CHUNK_SIZE = 500
+PARTITION_PREFIX = 'log_month='
+FILE_SUFFIX = '.eldarc'
+NULL_INT = -2 ** 63
+
+TYPECODES = {
+    'int': 'q',
+    'float': 'd',
+    'date': 'q',  # Proleptic Gregorian ordinal
+    'time': 'q',  # Microseconds since midnight
+    'str': 'I',  # Index into the column dictionary
+}
+
+TABLES = {
+    'eld_logs': {
+        'model': ELDLog,
+        'ordering': ('log_date', 'start_time', 'id'),
+        'columns': [
+            ('id', 'int'),
+            ('log_date', 'date'),
+            ('start_time', 'time'),
+            ('end_time', 'time'),
+            ('duty_status', 'str'),
+            ('location', 'str'),
+            ('odometer_start', 'int'),
+            ('odometer_end', 'int'),
+            ('duration', 'float'),
+            ('remarks', 'str'),
+        ],
+    },
+    'route_segments': {
+        'model': RouteSegment,
+        'ordering': ('sequence_order', 'id'),
+        'columns': [
+            ('id', 'int'),
+            ('sequence_order', 'int'),
+            ('start_location', 'str'),
+            ('end_location', 'str'),
+            ('distance', 'float'),
+            ('duration', 'float'),
+            ('segment_type', 'str'),
+        ],
+    },
+}
+
+
+def _encode_column(kind, values):
+    """Compress one column into bytes plus any metadata needed to decode it"""
+    meta = {}
+    if kind == 'str':
+        dictionary = {}
+        values = [dictionary.setdefault(v, len(dictionary)) for v in values]
+        meta['dictionary'] = list(dictionary)
+    elif kind == 'int':
+        values = [NULL_INT if v is None else v for v in values]
+    elif kind == 'date':
+        values = [v.toordinal() for v in values]
+    elif kind == 'time':
+        values = [
+            ((v.hour * 60 + v.minute) * 60 + v.second) * 1_000_000 + v.microsecond
+            for v in values
+        ]
+
+    data = array.array(TYPECODES[kind], values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return zlib.compress(data.tobytes()), meta
+
+
+def _decode_column(kind, buffer, meta, start, count):
+    """Inflate one column and return the Python values of rows [start, start + count)"""
+    data = array.array(TYPECODES[kind])
+    data.frombytes(zlib.decompress(buffer))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    values = data[start:start + count]
+
+    if kind == 'str':
+        dictionary = meta['dictionary']
+        return [dictionary[v] for v in values]
+    if kind == 'int':
+        return [None if v == NULL_INT else v for v in values]
+    if kind == 'date':
+        return [date.fromordinal(v) for v in values]
+    if kind == 'time':
+        result = []
+        for v in values:
+            seconds, micros = divmod(v, 1_000_000)
+            minutes, second = divmod(seconds, 60)
+            hour, minute = divmod(minutes, 60)
+            result.append(time(hour, minute, second, micros))
+        return result
+    return list(values)
+
+
+class ArchiveWriter:
+    """Writes one archive file; the file only appears at its path once closed"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(MAGIC)
+        self._tables = {
+            name: {'columns': spec['columns'], 'row_groups': []}
+            for name, spec in TABLES.items()
+        }
+        self._pending = {name: [] for name in TABLES}
+        self._trips = {}
+
+    def add_trip(self, trip_id, rows_by_table):
+        for name, rows in rows_by_table.items():
+            if not rows:
+                continue
+            # Keep each trip inside a single row group
+            if self._pending[name] and len(self._pending[name]) + len(rows) > ROW_GROUP_SIZE:
+                self._flush(name)
+            pending = self._pending[name]
+            row_group = len(self._tables[name]['row_groups'])
+            self._trips.setdefault(trip_id.hex, {})[name] = [row_group, len(pending), len(rows)]
+            pending.extend(rows)
+
+    def _flush(self, name):
+        rows = self._pending[name]
+        if not rows:
+            return
+        columns = {}
+        for column, kind in self._tables[name]['columns']:
+            blob, meta = _encode_column(kind, [row[column] for row in rows])
+            columns[column] = [self._file.tell(), len(blob), meta]
+            self._file.write(blob)
+        self._tables[name]['row_groups'].append({'rows': len(rows), 'columns': columns})
+        self._pending[name] = []
+
+    def close(self):
+        for name in TABLES:
+            self._flush(name)
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'tables': self._tables,
+            'trips': self._trips,
+        }, separators=(',', ':')).encode('utf-8')
+        self._file.write(header)
+        self._file.write(FOOTER.pack(len(header), MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=256)
+def _read_header(path, mtime_ns, size):
+    """Parse an archive footer; cached until the file changes"""
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = len(mm) - FOOTER.size
+        header_length, magic = FOOTER.unpack_from(mm, end)
+        if magic != MAGIC or mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an ELD archive file")
+        return json.loads(mm[end - header_length:end])
+
+
+def _decode_rows(view, table_header, row_group_index, start, count):
+    row_group = table_header['row_groups'][row_group_index]
+    decoded = {}
+    for column, kind in table_header['columns']:
+        offset, length, meta = row_group['columns'][column]
+        decoded[column] = _decode_column(kind, view[offset:offset + length], meta, start, count)
+    return [dict(zip(decoded, values)) for values in zip(*decoded.values())]
+
+
+def _header(path):
+    path = str(path)
+    stat = os.stat(path)
+    return _read_header(path, stat.st_mtime_ns, stat.st_size)
+
+
+def read_trip_rows(path, table, trip_id):
+    """Read one trip's rows of table from an archive file as a list of dicts"""
+    header = _header(path)
+    location = header['trips'].get(trip_id.hex, {}).get(table)
+    if location is None:
+        return []
+
+    row_group_index, start, count = location
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            return _decode_rows(view, header['tables'][table], row_group_index, start, count)
+
+
+def iter_archived_trips(path):
+    """Yield (trip_id, rows_by_table) for every trip in an archive file, inflating each row group once"""
+    header = _header(path)
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            # Trips are stored in write order, so each row group is needed by a contiguous run of trips
+            current = {}
+            for trip_hex, locations in header['trips'].items():
+                rows_by_table = {}
+                for table, (row_group_index, start, count) in locations.items():
+                    cached = current.get(table)
+                    if cached is None or cached[0] != row_group_index:
+                        table_header = header['tables'][table]
+                        rows = table_header['row_groups'][row_group_index]['rows']
+                        cached = current[table] = (
+                            row_group_index, _decode_rows(view, table_header, row_group_index, 0, rows)
+                        )
+                    rows_by_table[table] = cached[1][start:start + count]
+                yield uuid.UUID(trip_hex), rows_by_table
+
+
+def _archive_path(relative_path):
+    return Path(settings.ELD_ARCHIVE_ROOT) / relative_path
+
+
+def _relative_path(path):
+    return Path(path).relative_to(settings.ELD_ARCHIVE_ROOT).as_posix()
+
+
+def _new_file_path(month):
+    return f"{PARTITION_PREFIX}{month}/{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}{FILE_SUFFIX}"
+
+
+def _read_archived(trip_archive, table):
+    # Cache on the stub so one request never inflates the same rows twice
+    cache = trip_archive.__dict__.setdefault('_archived_rows', {})
+    if table not in cache:
+        try:
+            rows = read_trip_rows(_archive_path(trip_archive.path), table, trip_archive.trip_id)
+        except FileNotFoundError:
+            # Compaction may have moved the trip to a new file since the stub was loaded
+            try:
+                trip_archive.refresh_from_db(fields=['path'])
+            except TripArchive.DoesNotExist:
+                return []
+            rows = read_trip_rows(_archive_path(trip_archive.path), table, trip_archive.trip_id)
+        cache[table] = rows
+    return cache[table]
+
+
+def load_eld_logs(trip_archive):
+    """Unsaved ELDLog instances for an archived trip, in log order"""
+    rows = _read_archived(trip_archive, 'eld_logs')
+    return [ELDLog(trip_id=trip_archive.trip_id, **row) for row in rows]
+
+
+def load_route_segments(trip_archive):
+    """Unsaved RouteSegment instances for an archived trip, in sequence order"""
+    rows = _read_archived(trip_archive, 'route_segments')
+    return [RouteSegment(trip_id=trip_archive.trip_id, **row) for row in rows]
+
+
+def get_trip_archive(trip):
+    """The trip's archive stub, or None if its logs are still in the hot tables"""
+    try:
+        return trip.archive
+    except TripArchive.DoesNotExist:
+        return None
+
+
+def get_trip_eld_logs(trip):
+    """Like get_eld_logs, reusing a stub already loaded with select_related('archive')"""
+    trip_archive = get_trip_archive(trip)
+    if trip_archive is None:
+        return ELDLog.objects.filter(trip=trip)
+    return load_eld_logs(trip_archive)
+
+
+def get_eld_logs(trip_id):
+    """ELD logs for a trip, from the hot table or the archive"""
+    trip_archive = TripArchive.objects.filter(trip_id=trip_id).first()
+    if trip_archive is None:
+        return ELDLog.objects.filter(trip_id=trip_id)
+    return load_eld_logs(trip_archive)
+
+
+def get_route_segments(trip_id):
+    """Route segments for a trip, from the hot table or the archive"""
+    trip_archive = TripArchive.objects.filter(trip_id=trip_id).first()
+    if trip_archive is None:
+        return RouteSegment.objects.filter(trip_id=trip_id)
+    return load_route_segments(trip_archive)
+
+
+def closed_trips(cutoff):
+    """Unarchived trips whose last logged day is before cutoff"""
+    return (
+        Trip.objects.filter(archive__isnull=True)
+        .annotate(last_log_date=Max('eld_logs__log_date'))
+        .filter(last_log_date__lt=cutoff)
+    )
+
+
+def _rows_by_trip(table, trip_ids):
+    spec = TABLES[table]
+    columns = [column for column, _ in spec['columns']]
+    queryset = spec['model'].objects.filter(trip_id__in=trip_ids).order_by(
+        'trip_id', *spec['ordering']
+    ).values('trip_id', *columns)
+
+    grouped = {}
+    for row in queryset.iterator():
+        grouped.setdefault(row.pop('trip_id'), []).append(row)
+    return grouped
+
+
+def _delete_rows(model, ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        model.objects.filter(id__in=ids[start:start + CHUNK_SIZE]).delete()
+
+
+def archive_trips(trip_ids, cutoff):
+    """Move the logs and segments of closed trips into archive files, leaving TripArchive stubs"""
+    stubs = []
+    written = []
+    try:
+        # Read, write and delete in one transaction so no row can appear in between
+        with transaction.atomic():
+            trip_ids = list(closed_trips(cutoff).filter(id__in=trip_ids).values_list('id', flat=True))
+            logs = _rows_by_trip('eld_logs', trip_ids)
+            segments = _rows_by_trip('route_segments', trip_ids)
+
+            # Partition by the month of each trip's first log
+            partitions = {}
+            for trip_id, trip_logs in logs.items():
+                partitions.setdefault(trip_logs[0]['log_date'].strftime('%Y-%m'), []).append(trip_id)
+
+            for month, month_trip_ids in sorted(partitions.items()):
+                relative_path = _new_file_path(month)
+                writer = ArchiveWriter(_archive_path(relative_path))
+                try:
+                    for trip_id in month_trip_ids:
+                        trip_logs = logs[trip_id]
+                        trip_segments = segments.get(trip_id, [])
+                        writer.add_trip(trip_id, {
+                            'eld_logs': trip_logs,
+                            'route_segments': trip_segments,
+                        })
+                        stubs.append(TripArchive(
+                            trip_id=trip_id,
+                            path=relative_path,
+                            first_log_date=trip_logs[0]['log_date'],
+                            last_log_date=trip_logs[-1]['log_date'],
+                            log_count=len(trip_logs),
+                            segment_count=len(trip_segments),
+                        ))
+                except BaseException:
+                    writer.abort()
+                    raise
+                writer.close()
+                written.append(writer.path)
+
+            TripArchive.objects.bulk_create(stubs)
+            # Delete exactly the rows that were written, never a whole trip
+            _delete_rows(ELDLog, [row['id'] for rows in logs.values() for row in rows])
+            _delete_rows(RouteSegment, [row['id'] for rows in segments.values() for row in rows])
+    except BaseException:
+        # Nothing references the new files unless the stubs were committed
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+
+    return stubs
+
+
+def archive_months():
+    """Months that have an archive partition on disk"""
+    root = Path(settings.ELD_ARCHIVE_ROOT)
+    if not root.is_dir():
+        return []
+    return sorted(
+        directory.name[len(PARTITION_PREFIX):]
+        for directory in root.glob(f'{PARTITION_PREFIX}*') if directory.is_dir()
+    )
+
+
+def _partition_files(month):
+    return sorted(_archive_path(f'{PARTITION_PREFIX}{month}').glob(f'*{FILE_SUFFIX}'))
+
+
+def _existing_trip_ids(trip_ids):
+    existing = set()
+    for start in range(0, len(trip_ids), CHUNK_SIZE):
+        chunk = trip_ids[start:start + CHUNK_SIZE]
+        existing.update(Trip.objects.filter(id__in=chunk).values_list('id', flat=True))
+    return existing
+
+
+def _partition_state(month):
+    """Files of a month, where each stored trip lives, their stubs and which trips still exist"""
+    files = _partition_files(month)
+    relative_paths = [_relative_path(path) for path in files]
+    stored = {}
+    for path, relative_path in zip(files, relative_paths):
+        for trip_hex in _header(path)['trips']:
+            stored.setdefault(uuid.UUID(trip_hex), []).append(relative_path)
+    stubs = dict(TripArchive.objects.filter(path__in=relative_paths).values_list('trip_id', 'path'))
+    existing = _existing_trip_ids(list(stored))
+    return files, relative_paths, stored, stubs, existing
+
+
+def needs_compaction(month):
+    """True if a month is split over several files or holds rows of deleted trips"""
+    files, _, stored, _, existing = _partition_state(month)
+    return len(files) > 1 or len(existing) < len(stored)
+
+
+def compact_partition(month):
+    """Merge a month's archive files into one and repoint its stubs.
+
+    Only rows of trips whose Trip row is gone are dropped; a trip that still
+    exists is kept even if its stub was removed. Returns the new file's relative
+    path, or None if nothing in the month belongs to an existing trip.
+    """
+    files, old_paths, _, stubs, existing = _partition_state(month)
+
+    new_path = None
+    if existing:
+        new_path = _new_file_path(month)
+        writer = ArchiveWriter(_archive_path(new_path))
+        written = set()
+        try:
+            for path, relative_path in zip(files, old_paths):
+                for trip_id, rows_by_table in iter_archived_trips(path):
+                    if trip_id not in existing or trip_id in written:
+                        continue
+                    # Copy a trip from the file its stub points at, if it still has one
+                    if stubs.get(trip_id, relative_path) != relative_path:
+                        continue
+                    writer.add_trip(trip_id, rows_by_table)
+                    written.add(trip_id)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+
+        try:
+            with transaction.atomic():
+                TripArchive.objects.filter(path__in=old_paths).update(path=new_path)
+        except BaseException:
+            _archive_path(new_path).unlink(missing_ok=True)
+            raise
+
+    for path in files:
+        path.unlink(missing_ok=True)
+    return new_path
+
+
+def compact_archive():
+    """Compact every month that needs it.
+
+    Returns the compacted months and the ids of existing trips whose archived
+    rows have no stub, which therefore cannot be read through the API.
+    """
+    compacted = []
+    unreferenced = []
+    for month in archive_months():
+        files, _, stored, stubs, existing = _partition_state(month)
+        unreferenced.extend(sorted(trip_id for trip_id in existing if trip_id not in stubs))
+        if len(files) > 1 or len(existing) < len(stored):
+            compact_partition(month)
+            compacted.append(month)
+    return compacted, unreferenced
+
+
+class ArchiveLocked(Exception):
+    pass
+
+
+@contextmanager
+def archive_lock():
+    """Hold an exclusive lock on ELD_ARCHIVE_ROOT for the duration of the block"""
+    import fcntl
+
+    root = Path(settings.ELD_ARCHIVE_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / '.lock', 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ArchiveLocked(f"{root} is locked by another archive run")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from trip_planner.archive import (
+    ArchiveLocked, archive_lock, archive_trips, closed_trips, compact_archive
+)
+
+
+class Command(BaseCommand):
+    help = 'Move ELD logs and route segments of closed trips past the retention window into the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before', type=date.fromisoformat,
+            help='Archive trips whose last log is before this date (YYYY-MM-DD). '
+                 'Defaults to ELD_ARCHIVE_RETENTION_DAYS ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Trips per archive batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many trips would be archived')
+        parser.add_argument('--vacuum', action='store_true', help='Reclaim freed SQLite pages afterwards')
+
+    def handle(self, *args, **options):
+        cutoff = options['before'] or (
+            timezone.localdate() - timedelta(days=settings.ELD_ARCHIVE_RETENTION_DAYS)
+        )
+
+        # A trip is closed once its last logged day is before the cutoff
+        trip_ids = list(closed_trips(cutoff).values_list('id', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(trip_ids)} trips would be archived (cutoff {cutoff})")
+            return
+
+        # Compaction must never see another run's files before their stubs commit
+        try:
+            with archive_lock():
+                archived_trips, archived_logs, archived_segments, compacted, unreferenced = (
+                    self.archive(trip_ids, cutoff, options['batch_size'])
+                )
+        except ArchiveLocked:
+            raise CommandError('Another archive_eld_logs run is in progress')
+
+        if unreferenced:
+            self.stderr.write(self.style.WARNING(
+                f"{len(unreferenced)} archived trips have no TripArchive stub and are not "
+                f"readable through the API: {', '.join(str(trip_id) for trip_id in unreferenced)}"
+            ))
+
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived_trips} trips ({archived_logs} logs, "
+            f"{archived_segments} segments) with logs before {cutoff}; "
+            f"compacted {len(compacted)} months"
+        ))
+
+    def archive(self, trip_ids, cutoff, batch_size):
+        archived_trips = archived_logs = archived_segments = 0
+        for start in range(0, len(trip_ids), batch_size):
+            stubs = archive_trips(trip_ids[start:start + batch_size], cutoff)
+            archived_trips += len(stubs)
+            archived_logs += sum(stub.log_count for stub in stubs)
+            archived_segments += sum(stub.segment_count for stub in stubs)
+
+        # Merge this run's per-batch files and drop rows of deleted trips
+        compacted, unreferenced = compact_archive()
+        return archived_trips, archived_logs, archived_segments, compacted, unreferenced
@@ -56,4 +56,17 @@ class ELDLog(models.Model):
     remarks = models.TextField(blank=True)
     
     class Meta:
-        ordering = ['log_date', 'start_time']
\ No newline at end of file
+        ordering = ['log_date', 'start_time']
+
+class TripArchive(models.Model):
+    # Deleting the trip deletes this stub; its archived rows are dropped at the next compaction
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name='archive')
+    path = models.CharField(max_length=255)  # Relative to ELD_ARCHIVE_ROOT
+    first_log_date = models.DateField()
+    last_log_date = models.DateField()
+    log_count = models.IntegerField()
+    segment_count = models.IntegerField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archive of trip {self.trip_id} ({self.path})"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Trip, RouteSegment, ELDLog
+from .archive import get_trip_archive, load_eld_logs, load_route_segments
 
 class RouteSegmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,12 +13,33 @@ class ELDLogSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class TripSerializer(serializers.ModelSerializer):
-    route_segments = RouteSegmentSerializer(many=True, read_only=True)
-    eld_logs = ELDLogSerializer(many=True, read_only=True)
+    """Set include_archived in the context to read archived trips' logs and segments"""
+    route_segments = serializers.SerializerMethodField()
+    eld_logs = serializers.SerializerMethodField()
+    archived = serializers.SerializerMethodField()
     
     class Meta:
         model = Trip
         fields = '__all__'
+    
+    def get_archived(self, trip):
+        return get_trip_archive(trip) is not None
+    
+    def get_route_segments(self, trip):
+        trip_archive = get_trip_archive(trip)
+        if trip_archive is None:
+            return RouteSegmentSerializer(trip.route_segments.all(), many=True).data
+        if not self.context.get('include_archived'):
+            return []
+        return RouteSegmentSerializer(load_route_segments(trip_archive), many=True).data
+    
+    def get_eld_logs(self, trip):
+        trip_archive = get_trip_archive(trip)
+        if trip_archive is None:
+            return ELDLogSerializer(trip.eld_logs.all(), many=True).data
+        if not self.context.get('include_archived'):
+            return []
+        return ELDLogSerializer(load_eld_logs(trip_archive), many=True).data
 
 class TripCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,294 @@
+import shutil
+import tempfile
+import uuid
+from datetime import date, time, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import archive
+from .models import Trip, RouteSegment, ELDLog, TripArchive
+
+
+class ColumnEncodingTests(TestCase):
+    def round_trip(self, kind, values, start=0, count=None):
+        blob, meta = archive._encode_column(kind, values)
+        count = len(values) if count is None else count
+        return archive._decode_column(kind, blob, meta, start, count)
+
+    def test_round_trip_every_kind(self):
+        cases = {
+            'int': [0, 1, -5, 2 ** 40, None, None, 7],
+            'float': [0.0, 1.5, -2.25, 1e-9, 712.3456789],
+            'date': [date(2024, 1, 1), date(1999, 12, 31), date(2026, 2, 28)],
+            'time': [time(0, 0), time(23, 59, 59, 999999), time(6, 30, 15, 123456)],
+            'str': ['Drive - 712.3 miles', 'Café São Paulo ✓', '', 'Drive - 712.3 miles', '日本'],
+        }
+        for kind, values in cases.items():
+            with self.subTest(kind=kind):
+                self.assertEqual(self.round_trip(kind, values), values)
+
+    def test_decodes_a_slice(self):
+        values = [None, 3, None, 4, 5]
+        self.assertEqual(self.round_trip('int', values, start=1, count=3), [3, None, 4])
+
+
+class ArchiveFileTests(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def log_rows(self, count, start_id=1):
+        return [{
+            'id': start_id + i,
+            'log_date': date(2025, 3, 1) + timedelta(days=i // 24),
+            'start_time': time(i % 24, 0, 0, i % 1000),
+            'end_time': time(i % 24, 59),
+            'duty_status': ['OFF', 'SB', 'D', 'ON'][i % 4],
+            'location': f"Mile marker {i % 7}",
+            'odometer_start': None if i % 3 else i,
+            'odometer_end': None,
+            'duration': i / 8.0,
+            'remarks': 'Überprüfung' if i % 2 else '',
+        } for i in range(count)]
+
+    def segment_rows(self, count):
+        return [{
+            'id': i + 1,
+            'sequence_order': i + 1,
+            'start_location': 'Chicago, IL',
+            'end_location': 'Denver, CO',
+            'distance': 1003.5,
+            'duration': 18.2,
+            'segment_type': 'travel',
+        } for i in range(count)]
+
+    def test_trips_larger_than_a_row_group_and_without_segments(self):
+        big, small, no_segments = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        big_logs = self.log_rows(archive.ROW_GROUP_SIZE + 10)
+        small_logs = self.log_rows(5, start_id=100000)
+        path = self.directory / 'file.eldarc'
+
+        writer = archive.ArchiveWriter(path)
+        writer.add_trip(small, {'eld_logs': small_logs, 'route_segments': self.segment_rows(4)})
+        writer.add_trip(big, {'eld_logs': big_logs, 'route_segments': self.segment_rows(2)})
+        writer.add_trip(no_segments, {'eld_logs': small_logs, 'route_segments': []})
+        writer.close()
+
+        self.assertEqual(archive.read_trip_rows(path, 'eld_logs', big), big_logs)
+        self.assertEqual(archive.read_trip_rows(path, 'eld_logs', small), small_logs)
+        self.assertEqual(archive.read_trip_rows(path, 'route_segments', small), self.segment_rows(4))
+        self.assertEqual(archive.read_trip_rows(path, 'route_segments', no_segments), [])
+        self.assertEqual(archive.read_trip_rows(path, 'eld_logs', uuid.uuid4()), [])
+
+        streamed = dict(archive.iter_archived_trips(path))
+        self.assertEqual(streamed[big]['eld_logs'], big_logs)
+        self.assertNotIn('route_segments', streamed[no_segments])
+
+    def test_aborted_writer_leaves_no_file(self):
+        writer = archive.ArchiveWriter(self.directory / 'file.eldarc')
+        writer.abort()
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+
+class ArchiveCommandTests(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(ELD_ARCHIVE_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.old_trips = [
+            self.create_trip(date(2025, 1, 10)),
+            self.create_trip(date(2025, 1, 20)),
+            self.create_trip(date(2025, 3, 5)),
+        ]
+        self.recent_trip = self.create_trip(date.today())
+
+    def create_trip(self, first_day):
+        trip = Trip.objects.create(
+            current_location='Chicago, IL',
+            pickup_location='Denver, CO',
+            dropoff_location='Salt Lake City, UT',
+            current_cycle_used=12.5,
+            total_distance=1400.2,
+            estimated_duration=27.5,
+            fuel_stops_needed=1,
+        )
+        for order, segment_type in enumerate(['travel', 'pickup', 'travel', 'dropoff'], start=1):
+            RouteSegment.objects.create(
+                trip=trip, sequence_order=order, start_location='A', end_location='B',
+                distance=500.0 if segment_type == 'travel' else 0, duration=9.1,
+                segment_type=segment_type,
+            )
+        for day in range(3):
+            for hour, status in [(0, 'OFF'), (10, 'D'), (19, 'ON')]:
+                ELDLog.objects.create(
+                    trip=trip, log_date=first_day + timedelta(days=day),
+                    start_time=time(hour, 0, 0, 250000), end_time=time(hour + 4, 30),
+                    duty_status=status, location='Zoë’s Truck Stop', duration=4.5,
+                    odometer_start=None if status == 'OFF' else 1000 * day,
+                    remarks=f"{status} day {day}",
+                )
+        return trip
+
+    def archive(self, *args):
+        call_command('archive_eld_logs', '--before', '2025-06-01', *args, stdout=StringIO())
+
+    def archive_files(self):
+        return sorted(self.root.rglob('*.eldarc'))
+
+    def test_dry_run_leaves_everything_in_place(self):
+        logs, segments = ELDLog.objects.count(), RouteSegment.objects.count()
+        out = StringIO()
+        call_command('archive_eld_logs', '--before', '2025-06-01', '--dry-run', stdout=out)
+
+        self.assertIn('3 trips would be archived', out.getvalue())
+        self.assertEqual(ELDLog.objects.count(), logs)
+        self.assertEqual(RouteSegment.objects.count(), segments)
+        self.assertFalse(TripArchive.objects.exists())
+        self.assertEqual(self.archive_files(), [])
+
+    def test_moves_closed_trips_only(self):
+        self.archive()
+
+        self.assertEqual(TripArchive.objects.count(), 3)
+        self.assertFalse(ELDLog.objects.filter(trip__in=self.old_trips).exists())
+        self.assertFalse(RouteSegment.objects.filter(trip__in=self.old_trips).exists())
+        self.assertEqual(ELDLog.objects.filter(trip=self.recent_trip).count(), 9)
+
+    def test_failed_stub_insert_rolls_back(self):
+        logs, segments = ELDLog.objects.count(), RouteSegment.objects.count()
+        with mock.patch.object(TripArchive.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.archive()
+
+        self.assertFalse(TripArchive.objects.exists())
+        self.assertEqual(ELDLog.objects.count(), logs)
+        self.assertEqual(RouteSegment.objects.count(), segments)
+        self.assertEqual(self.archive_files(), [])
+
+    def test_rechecks_cutoff_before_archiving(self):
+        trip = self.old_trips[0]
+        ELDLog.objects.create(
+            trip=trip, log_date=date.today(), start_time=time(8), end_time=time(9),
+            duty_status='D', location='X', duration=1.0,
+        )
+        stubs = archive.archive_trips([t.id for t in self.old_trips], date(2025, 6, 1))
+
+        self.assertNotIn(trip.id, [stub.trip_id for stub in stubs])
+        self.assertEqual(ELDLog.objects.filter(trip=trip).count(), 10)
+
+    def test_one_file_per_month_per_run(self):
+        self.archive('--batch-size', '1')
+        self.assertEqual(
+            [path.parent.name for path in self.archive_files()],
+            ['log_month=2025-01', 'log_month=2025-03'],
+        )
+
+        # A later run merges its files into the month's existing file
+        later_trip = self.create_trip(date(2025, 1, 25))
+        self.archive('--batch-size', '1')
+        files = self.archive_files()
+        self.assertEqual(len(files), 2)
+        self.assertEqual(TripArchive.objects.get(trip=later_trip).path, archive._relative_path(files[0]))
+        self.assertEqual(len(archive.get_eld_logs(later_trip.id)), 9)
+
+    def test_compaction_drops_deleted_trips(self):
+        self.archive()
+        january = self.archive_files()[0]
+        self.old_trips[0].delete()
+        self.assertTrue(archive.needs_compaction('2025-01'))
+
+        self.archive()
+        files = self.archive_files()
+        self.assertNotIn(january, files)
+        self.assertEqual(list(dict(archive.iter_archived_trips(files[0]))), [self.old_trips[1].id])
+        self.assertEqual(len(archive.get_eld_logs(self.old_trips[1].id)), 9)
+
+    def test_responses_unchanged_by_archiving(self):
+        client = APIClient()
+        urls = [
+            f'/api/trips/{trip.id}/{suffix}'
+            for trip in self.old_trips
+            for suffix in ['', 'logs/', 'log-sheets/', 'summary/', 'route/']
+        ]
+        before = {url: client.get(url).json() for url in urls}
+        self.archive()
+        after = {url: client.get(url).json() for url in urls}
+
+        self.assertEqual(TripArchive.objects.count(), 3)
+        for url in urls:
+            with self.subTest(url=url):
+                # Only the trip's archived flag may change
+                trip_before = self.trip_payload(before[url])
+                trip_after = self.trip_payload(after[url])
+                if trip_after is not None:
+                    self.assertIs(trip_before.pop('archived'), False)
+                    self.assertIs(trip_after.pop('archived'), True)
+                self.assertEqual(after[url], before[url])
+
+    def trip_payload(self, response):
+        if isinstance(response, dict):
+            return response.get('trip_details', response if 'archived' in response else None)
+        return None
+
+    def test_list_flags_archived_trips_without_their_logs(self):
+        self.archive()
+        trips = {trip['id']: trip for trip in APIClient().get('/api/trips/').json()}
+
+        archived = trips[str(self.old_trips[0].id)]
+        self.assertIs(archived['archived'], True)
+        self.assertEqual(archived['eld_logs'], [])
+        recent = trips[str(self.recent_trip.id)]
+        self.assertIs(recent['archived'], False)
+        self.assertEqual(len(recent['eld_logs']), 9)
+
+    def test_summary_reads_archive_once(self):
+        self.archive()
+        with mock.patch.object(archive, 'read_trip_rows', wraps=archive.read_trip_rows) as read:
+            response = APIClient().get(f'/api/trips/{self.old_trips[0].id}/summary/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(call.args[1] for call in read.call_args_list), ['eld_logs', 'route_segments']
+        )
+
+    def test_compaction_keeps_existing_trip_without_stub(self):
+        self.archive()
+        trip = self.old_trips[0]
+        TripArchive.objects.filter(trip=trip).delete()
+        self.assertFalse(archive.needs_compaction('2025-01'))
+
+        later_trip = self.create_trip(date(2025, 1, 25))
+        err = StringIO()
+        call_command('archive_eld_logs', '--before', '2025-06-01', stdout=StringIO(), stderr=err)
+
+        self.assertIn(str(trip.id), err.getvalue())
+        files = self.archive_files()
+        stored = dict(archive.iter_archived_trips(files[0]))
+        self.assertEqual(
+            set(stored), {trip.id, self.old_trips[1].id, later_trip.id}
+        )
+        self.assertEqual(len(stored[trip.id]['eld_logs']), 9)
+
+    def test_missing_stub_during_read_returns_nothing(self):
+        self.archive()
+        trip_archive = TripArchive.objects.get(trip=self.old_trips[0])
+        TripArchive.objects.filter(pk=trip_archive.pk).delete()
+        for path in self.archive_files():
+            path.unlink()
+
+        self.assertEqual(archive.load_eld_logs(trip_archive), [])
+
+    def test_refuses_to_run_concurrently(self):
+        with archive.archive_lock():
+            with self.assertRaises(CommandError):
+                self.archive()
+        self.assertFalse(TripArchive.objects.exists())
@@ -3,8 +3,9 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from .models import Trip, RouteSegment, ELDLog
+from .models import Trip
 from .serializers import TripSerializer, TripCreateSerializer, RouteSegmentSerializer, ELDLogSerializer
+from .archive import get_eld_logs, get_route_segments, get_trip_eld_logs
 from .services import TripPlannerService
 
 class TripCreateView(APIView):
@@ -33,13 +34,18 @@ class TripCreateView(APIView):
 
 class TripDetailView(generics.RetrieveAPIView):
     """Get trip details"""
-    queryset = Trip.objects.all()
+    queryset = Trip.objects.select_related('archive')
     serializer_class = TripSerializer
     lookup_field = 'id'
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_archived'] = True
+        return context
 
 class TripListView(generics.ListAPIView):
-    """List all trips"""
-    queryset = Trip.objects.all().order_by('-created_at')
+    """List all trips; archived trips are flagged and listed without their logs and segments"""
+    queryset = Trip.objects.select_related('archive').order_by('-created_at')
     serializer_class = TripSerializer
 
 class RouteSegmentsView(generics.ListAPIView):
@@ -48,7 +54,7 @@ class RouteSegmentsView(generics.ListAPIView):
     
     def get_queryset(self):
         trip_id = self.kwargs['trip_id']
-        return RouteSegment.objects.filter(trip_id=trip_id)
+        return get_route_segments(trip_id)
 
 class ELDLogsView(generics.ListAPIView):
     """Get ELD logs for a trip"""
@@ -56,14 +62,14 @@ class ELDLogsView(generics.ListAPIView):
     
     def get_queryset(self):
         trip_id = self.kwargs['trip_id']
-        return ELDLog.objects.filter(trip_id=trip_id)
+        return get_eld_logs(trip_id)
 
 class ELDLogSheetView(APIView):
     """Generate ELD log sheet data for visualization"""
     
     def get(self, request, trip_id):
-        trip = get_object_or_404(Trip, id=trip_id)
-        logs = ELDLog.objects.filter(trip=trip)
+        trip = get_object_or_404(Trip.objects.select_related('archive'), id=trip_id)
+        logs = get_trip_eld_logs(trip)
         
         # Group logs by date for daily log sheets
         log_sheets = {}
@@ -103,8 +109,8 @@ class TripSummaryView(APIView):
     """Get trip summary with key metrics"""
     
     def get(self, request, trip_id):
-        trip = get_object_or_404(Trip, id=trip_id)
-        logs = ELDLog.objects.filter(trip=trip)
+        trip = get_object_or_404(Trip.objects.select_related('archive'), id=trip_id)
+        logs = get_trip_eld_logs(trip)
         
         # Calculate summary metrics
         total_driving_time = sum(log.duration for log in logs if log.duty_status == 'D')
@@ -113,7 +119,7 @@ class TripSummaryView(APIView):
         
         summary = {
             'trip_id': str(trip_id),
-            'trip_details': TripSerializer(trip).data,
+            'trip_details': TripSerializer(trip, context={'include_archived': True}).data,
             'time_summary': {
                 'total_driving_hours': round(total_driving_time, 2),
                 'total_on_duty_hours': round(total_on_duty_time, 2),